@@ -20,7 +20,11 @@ def get_agent(agent_id: str) -> CompiledStateGraph:
     return agents[agent_id].graph
 
 
+# Built once since the registry is fixed at import time
+_AGENT_INFO: tuple[AgentInfo, ...] = tuple(
+    AgentInfo(key=agent_id, description=agent.description) for agent_id, agent in agents.items()
+)
+
+
 def get_all_agent_info() -> list[AgentInfo]:
-    return [
-        AgentInfo(key=agent_id, description=agent.description) for agent_id, agent in agents.items()
-    ]
+    return list(_AGENT_INFO)
@@ -1,7 +1,6 @@
 from typing import  Literal
-from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage, SystemMessage
-from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnableSerializable
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, MessagesState, StateGraph
 
@@ -18,19 +17,12 @@ If the text is not related to the product, return "neutral".
 Do not provide any additional explanation - only return the sentiment classification.
 """
 
+_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT)
 
-def wrap_model(model: BaseChatModel) -> RunnableSerializable[MessagesState, AIMessage]:
-    # model = model.bind_tools(tools)
-    preprocessor = RunnableLambda(
-                    lambda state: [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"],
-                    name="StateModifier",
-                    )
-    return preprocessor | model
 
 async def acall_model(state: MessagesState, config: RunnableConfig) -> MessagesState:
     m = get_model(config["configurable"].get("model", settings.DEFAULT_MODEL))
-    model_runnable = wrap_model(m)
-    response = await model_runnable.ainvoke(state, config)
+    response = await m.ainvoke([_SYSTEM_MSG, *state["messages"]], config)
 
     # We return a list, because this will get added to the existing list
     return {"messages": [response]}
@@ -0,0 +1,22 @@
+import hmac
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from core.settings import settings
+
+_BEARER = HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)
+_AUTH_SECRET = settings.AUTH_SECRET.get_secret_value().encode() if settings.AUTH_SECRET else None
+
+if _AUTH_SECRET:
+    def verify_bearer(
+        http_auth: Annotated[HTTPAuthorizationCredentials | None, Depends(_BEARER)],
+    ) -> None:
+        """Reject requests whose bearer token does not match AUTH_SECRET."""
+        if not http_auth or not hmac.compare_digest(http_auth.credentials.encode(), _AUTH_SECRET):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+else:
+    # No secret configured: a parameterless dependency skips the bearer scheme
+    def verify_bearer() -> None:
+        return None
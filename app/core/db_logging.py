@@ -1,25 +1,116 @@
+import asyncio
+import copy
+import json
 import logging
+import os
+import re
 import sqlite3
 import sys
+import threading
+import time
 
-from dataclasses import dataclass
-from datetime import datetime
-from logging.handlers import QueueHandler, QueueListener
-from queue import Queue
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import aiosqlite
 
 
-@dataclass
-class LogRecord:
-    timestamp: str
-    level: str
-    logger_name: str
-    message: str
-    exc_info: Optional[str] = None
-    thread_name: Optional[str] = None
-    process_name: Optional[str] = None
-    extra: Optional[Dict[str, Any]] = None
+_INSERT_SQL = '''
+INSERT INTO logs (timestamp, level, logger_name, message, exc_info, thread_name, process_name, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# WAL lets the log viewer read while the handler writes, and synchronous=NORMAL
+# only fsyncs at checkpoints instead of on every insert.
+_WRITE_PRAGMAS = '''
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA busy_timeout=5000;
+PRAGMA cache_size=-20000;
+PRAGMA temp_store=memory;
+PRAGMA mmap_size=268435456;
+'''
+
+_READ_PRAGMAS = '''
+PRAGMA busy_timeout=5000;
+PRAGMA cache_size=-20000;
+PRAGMA temp_store=memory;
+PRAGMA mmap_size=268435456;
+PRAGMA query_only=1;
+'''
+
+# The writer thread commits once it has collected this many records or once
+# this many seconds have passed since the first record of the batch.
+_BATCH_SIZE = 256
+_FLUSH_INTERVAL = 0.1
+
+# get_logs statements for every combination of the optional filters, keyed by
+# a bitmask of which are set (level, logger_name). The time range always leads
+# so idx_logs_ts_level can be used.
+_LOG_FILTER_CLAUSES = (
+    (0b10, "level = ?"),
+    (0b01, "logger_name = ?"),
+)
+_GET_LOGS_WHERE = {
+    mask: "SELECT timestamp, level, logger_name, message, exc_info, thread_name, process_name, extra FROM logs"
+          " WHERE timestamp BETWEEN ? AND ?"
+          + "".join(f" AND {clause}" for bit, clause in _LOG_FILTER_CLAUSES if mask & bit)
+    for mask in range(4)
+}
+_GET_LOGS_ORDER = " ORDER BY timestamp DESC LIMIT ?"
+_GET_LOGS_SQL = {mask: where + _GET_LOGS_ORDER for mask, where in _GET_LOGS_WHERE.items()}
+
+# clear_old_logs deletes at most this many rows per transaction
+_CLEANUP_BATCH_SIZE = 10000
+
+# How long a query waits for a pooled read connection before giving up with
+# TimeoutError. Streams hold theirs until fully read, so slow clients can
+# exhaust the pool.
+_READER_ACQUIRE_TIMEOUT = 5.0
+
+# Bounds used when get_logs is called without start_time/end_time
+_MIN_TIMESTAMP = 0
+_MAX_TIMESTAMP = 2**63 - 1
+
+# Keys accepted by get_logs(extra_filter=...). They are inlined into the
+# json_extract path, so only plain identifiers are allowed.
+_EXTRA_KEY_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Standard LogRecord attributes that are not stored in the extra column
+_RESERVED_LOGRECORD_ATTRS = frozenset({
+    'args', 'exc_info', 'exc_text', 'message', 'msg', 'levelname',
+    'levelno', 'pathname', 'filename', 'module', 'lineno', 'funcName',
+    'created', 'msecs', 'relativeCreated', 'name', 'threadName',
+    'processName', 'thread', 'process',
+})
+
+# Renders tracebacks into exc_text before records cross to the writer thread
+_EXC_FORMATTER = logging.Formatter()
+
+# Put on the queue by close() to tell the writer thread to stop
+_SENTINEL = None
+
+
+def _to_epoch_us(timestamp: str) -> int:
+    """Convert an ISO timestamp (local time if naive) to epoch microseconds."""
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+
+
+def _from_epoch_us(timestamp: int) -> str:
+    """Convert epoch microseconds to a local ISO timestamp."""
+    return datetime.fromtimestamp(timestamp / 1_000_000).isoformat()
+
+
+def _load_extra(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse the stored extra column. Rows written before it held JSON are ignored."""
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
 
 
 class AsyncDBLogHandler(logging.Handler):
@@ -32,28 +123,22 @@ class AsyncDBLogHandler(logging.Handler):
         super().__init__()
         self.db_path = db_path
         self.queue: Queue = Queue(maxsize=queue_size)
+        # Records dropped because the queue was full
+        self.dropped_records = 0
         self._initialize_db()
         
-        # Set up the queue handler and listener
-        self.queue_handler = QueueHandler(self.queue)
-        
-        # Create a proper handler class for the db_handler
-        class DBHandler(logging.Handler):
-            def __init__(self, parent):
-                super().__init__()
-                self.parent = parent
-                
-            def emit(self, record):
-                self.parent._db_handler(record)
-                
-        # Use the proper handler class
-        self.db_handler = DBHandler(self)
-        self.listener = QueueListener(
-            self.queue, 
-            self.db_handler,
-            respect_handler_level=True
+        # Single long-lived connection used by the writer thread for inserts.
+        # It is opened lazily on the first batch so it belongs to that thread.
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        
+        # Set up the background writer thread
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name="AsyncDBLogHandler",
+            daemon=True
         )
-        self.listener.start()
+        self._writer.start()
         
         # Keep track of event loop for potential async operations
         self._loop = None
@@ -61,13 +146,29 @@ class AsyncDBLogHandler(logging.Handler):
     def _initialize_db(self) -> None:
         """Initialize the SQLite database and create tables if they don't exist."""
         conn = sqlite3.connect(self.db_path)
+        conn.executescript(_WRITE_PRAGMAS)
+        
+        # Incremental auto-vacuum lets clear_old_logs return freed pages to the OS.
+        # The mode only takes effect on a VACUUM, which is cheap for a new database.
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        
         cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        
+        # Tables from before timestamps were stored as epoch microseconds
+        # are rebuilt with the INTEGER column
+        columns = {row[1]: row[2] for row in cursor.execute("PRAGMA table_info(logs)")}
+        legacy = columns.get("timestamp") == "TEXT"
+        if legacy:
+            cursor.execute('ALTER TABLE logs RENAME TO logs_legacy')
         
         # Create logs table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
             level TEXT NOT NULL,
             logger_name TEXT NOT NULL,
             message TEXT NOT NULL,
@@ -78,64 +179,125 @@ class AsyncDBLogHandler(logging.Handler):
         )
         ''')
         
-        # Create index on timestamp and level for faster queries
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON logs (timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_level ON logs (level)')
+        if legacy:
+            # Old timestamps are naive local ISO strings
+            cursor.execute('''
+            INSERT INTO logs (timestamp, level, logger_name, message, exc_info, thread_name, process_name, extra)
+            SELECT CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000000
+                       + CAST(substr(timestamp || '.000000', 21, 6) AS INTEGER),
+                   level, logger_name, message, exc_info, thread_name, process_name, extra
+            FROM logs_legacy ORDER BY id
+            ''')
+            cursor.execute('DROP TABLE logs_legacy')
+        
+        # Create index for the time-bounded queries in get_logs. It also carries
+        # level and logger_name, replacing the old idx_timestamp and idx_level
+        # (which led the planner into sorting every row of a level).
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_ts_level ON logs (timestamp DESC, level, logger_name)')
+        cursor.execute('DROP INDEX IF EXISTS idx_timestamp')
+        cursor.execute('DROP INDEX IF EXISTS idx_level')
         
         conn.commit()
         conn.close()
     
-    def _db_handler(self, record: logging.LogRecord) -> None:
-        """Write a log record to the database."""
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the writer connection, opening it on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(_WRITE_PRAGMAS)
+        return self._conn
+    
+    def _to_row(self, record: logging.LogRecord) -> tuple:
+        """Convert a log record to the parameter tuple for _INSERT_SQL."""
+        extra = {k: v for k, v in record.__dict__.items() if k not in _RESERVED_LOGRECORD_ATTRS}
+        return (
+            int(record.created * 1_000_000),
+            record.levelname,
+            record.name,
+            record.getMessage(),
+            record.exc_text or None,
+            record.threadName,
+            record.processName,
+            json.dumps(extra, default=str) if extra else None
+        )
+    
+    def _write_batch(self, records: List[logging.LogRecord]) -> None:
+        """Write a batch of log records to the database in a single transaction."""
         try:
-            # Convert record to our custom format
-            log_record = LogRecord(
-                timestamp=datetime.fromtimestamp(record.created).isoformat(),
-                level=record.levelname,
-                logger_name=record.name,
-                message=record.getMessage(),
-                exc_info=record.exc_text if record.exc_text else None,
-                thread_name=record.threadName,
-                process_name=record.processName,
-                extra={k: v for k, v in record.__dict__.items() 
-                      if k not in ['args', 'exc_info', 'exc_text', 'message', 'msg', 'levelname', 
-                                  'levelno', 'pathname', 'filename', 'module', 'lineno', 'funcName', 
-                                  'created', 'msecs', 'relativeCreated', 'name', 'threadName', 
-                                  'processName', 'thread', 'process']} if hasattr(record, '__dict__') else None
-            )
-            
-            # Connect to the database and insert the record
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            INSERT INTO logs (timestamp, level, logger_name, message, exc_info, thread_name, process_name, extra)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                log_record.timestamp,
-                log_record.level,
-                log_record.logger_name,
-                log_record.message,
-                log_record.exc_info,
-                log_record.thread_name,
-                log_record.process_name,
-                str(log_record.extra) if log_record.extra else None
-            ))
-            
-            conn.commit()
-            conn.close()
+            rows = [self._to_row(record) for record in records]
+            with self._conn_lock:
+                conn = self._get_connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(_INSERT_SQL, rows)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
             
         except Exception as e:
             # If we fail to log to the database, print to stderr as a fallback
             print(f"Error writing to log database: {e}", file=sys.stderr)
     
+    def _writer_loop(self) -> None:
+        """Drain the queue in batches until close() sends the sentinel."""
+        while True:
+            record = self.queue.get()
+            if record is _SENTINEL:
+                return
+            
+            # Keep collecting until the batch is full or the flush interval is up
+            records = [record]
+            stop = False
+            deadline = time.monotonic() + _FLUSH_INTERVAL
+            while len(records) < _BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=timeout)
+                except Empty:
+                    break
+                if record is _SENTINEL:
+                    stop = True
+                    break
+                records.append(record)
+            
+            self._write_batch(records)
+            if stop:
+                return
+    
+    def _prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Copy the record with its message and traceback rendered to text."""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+    
     def emit(self, record: logging.LogRecord) -> None:
-        """Send the log record to the queue handler."""
-        self.queue_handler.emit(record)
+        """Queue the log record for the writer thread, dropping it if the queue is full."""
+        if record.levelno < self.level:
+            return
+        try:
+            self.queue.put_nowait(self._prepare(record))
+        except Full:
+            self.dropped_records += 1
+        except Exception:
+            self.handleError(record)
     
     def close(self) -> None:
-        """Stop the queue listener when the handler is closed."""
-        self.listener.stop()
+        """Flush pending records, stop the writer thread and close the database connection."""
+        if self._writer.is_alive():
+            self.queue.put(_SENTINEL)
+            self._writer.join()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
         super().close()
 
 
@@ -143,80 +305,192 @@ class AsyncDBLogger:
     """
     Utility class for working with the database logs.
     Provides methods to query and analyze logs asynchronously.
+    Queries are served from a small pool of read-only connections.
     """
     
-    def __init__(self, db_path: str = "logs.db"):
+    def __init__(self, db_path: str = "logs.db", pool_size: Optional[int] = None):
         self.db_path = db_path
+        if pool_size is not None and pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {pool_size}")
+        self.pool_size = pool_size if pool_size is not None else os.cpu_count() or 1
+        self._read_pool: asyncio.Queue = asyncio.Queue()
+        self._read_conns = 0
+        self._write_conn: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+    
+    async def _open_reader(self) -> aiosqlite.Connection:
+        """Open a read-only connection to the log database."""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = await aiosqlite.connect(uri, uri=True, check_same_thread=False)
+        await conn.executescript(_READ_PRAGMAS)
+        return conn
+    
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a read connection, opening a new one while the pool is below pool_size.
+        Raises TimeoutError if none is returned to the pool in time.
+        """
+        if self._read_pool.empty() and self._read_conns < self.pool_size:
+            self._read_conns += 1
+            try:
+                conn = await self._open_reader()
+            except Exception:
+                self._read_conns -= 1
+                raise
+        else:
+            conn = await asyncio.wait_for(self._read_pool.get(), _READER_ACQUIRE_TIMEOUT)
+        try:
+            yield conn
+        finally:
+            self._read_pool.put_nowait(conn)
+    
+    async def _get_write_conn(self) -> aiosqlite.Connection:
+        """Return the maintenance write connection, opening it on first use."""
+        if self._write_conn is None:
+            self._write_conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+            await self._write_conn.executescript(_WRITE_PRAGMAS)
+        return self._write_conn
+    
+    async def connect(self) -> None:
+        """Open the write connection and a first read connection ahead of the first request."""
+        await self._get_write_conn()
+        async with self._reader():
+            pass
+    
+    async def close(self) -> None:
+        """Close all idle read connections and the write connection."""
+        while not self._read_pool.empty():
+            conn = self._read_pool.get_nowait()
+            self._read_conns -= 1
+            await conn.close()
+        if self._write_conn is not None:
+            await self._write_conn.close()
+            self._write_conn = None
+    
+    @staticmethod
+    def _logs_query(level: Optional[str], 
+                    start_time: Optional[str], 
+                    end_time: Optional[str], 
+                    logger_name: Optional[str],
+                    limit: int,
+                    extra_filter: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """Build the SQL and parameters for a log query, validating the filters."""
+        mask = 0
+        params = [
+            _to_epoch_us(start_time) if start_time else _MIN_TIMESTAMP,
+            _to_epoch_us(end_time) if end_time else _MAX_TIMESTAMP,
+        ]
+        
+        if level:
+            mask |= 0b10
+            params.append(level)
+        
+        if logger_name:
+            mask |= 0b01
+            params.append(logger_name)
+        
+        if extra_filter:
+            clauses = []
+            for key, value in extra_filter.items():
+                if not _EXTRA_KEY_RE.fullmatch(key):
+                    raise ValueError(f"Invalid extra filter key: {key!r}")
+                # Rows written before extra was stored as JSON hold str(dict); treat
+                # them as having no extra instead of letting json_extract raise
+                clauses.append(f" AND json_extract(CASE WHEN json_valid(extra) THEN extra END, '$.{key}') = ?")
+                params.append(value)
+            query = _GET_LOGS_WHERE[mask] + "".join(clauses) + _GET_LOGS_ORDER
+        else:
+            query = _GET_LOGS_SQL[mask]
+        
+        params.append(limit)
+        return query, params
+    
+    @staticmethod
+    def _row_to_dict(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """Shape a logs table row like the LogEntry API model."""
+        return {
+            "timestamp": _from_epoch_us(row[0]),
+            "level": row[1],
+            "logger_name": row[2],
+            "message": row[3],
+            "exc_info": row[4],
+            "thread_name": row[5],
+            "process_name": row[6],
+            "extra": _load_extra(row[7]),
+        }
     
     async def get_logs(self, 
                  level: Optional[str] = None, 
                  start_time: Optional[str] = None, 
                  end_time: Optional[str] = None, 
                  logger_name: Optional[str] = None,
-                 limit: int = 100) -> List[LogRecord]:
-        """Query logs from the database with optional filters asynchronously."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            query = "SELECT timestamp, level, logger_name, message, exc_info, thread_name, process_name, extra FROM logs WHERE 1=1"
-            params = []
-            
-            if level:
-                query += " AND level = ?"
-                params.append(level)
-            
-            if start_time:
-                query += " AND timestamp >= ?"
-                params.append(start_time)
-            
-            if end_time:
-                query += " AND timestamp <= ?"
-                params.append(end_time)
-            
-            if logger_name:
-                query += " AND logger_name = ?"
-                params.append(logger_name)
-            
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
-            
+                 limit: int = 100,
+                 extra_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Query logs from the database with optional filters asynchronously.
+        Each log is returned as a dict with the same fields as the logs table.
+        extra_filter matches top-level keys of the JSON extra column, e.g. {"request_id": "abc"}.
+        """
+        query, params = self._logs_query(level, start_time, end_time, logger_name, limit, extra_filter)
+        
+        async with self._reader() as conn:
             async with conn.execute(query, params) as cursor:
                 rows = await cursor.fetchall()
-            
-            logs = []
-            for row in rows:
-                logs.append(LogRecord(
-                    timestamp=row[0],
-                    level=row[1],
-                    logger_name=row[2],
-                    message=row[3],
-                    exc_info=row[4],
-                    thread_name=row[5],
-                    process_name=row[6],
-                    extra=eval(row[7]) if row[7] else None
-                ))
-            
-            return logs
+        
+        return [self._row_to_dict(row) for row in rows]
+    
+    def iter_logs(self, 
+                  level: Optional[str] = None, 
+                  start_time: Optional[str] = None, 
+                  end_time: Optional[str] = None, 
+                  logger_name: Optional[str] = None,
+                  limit: int = 100,
+                  extra_filter: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Like get_logs, but yield rows as they are read from the cursor.
+        Filters are validated when this is called, before any row is fetched,
+        and the read connection is held until the iterator is exhausted or closed.
+        """
+        query, params = self._logs_query(level, start_time, end_time, logger_name, limit, extra_filter)
+        return self._iter_rows(query, params)
+    
+    async def _iter_rows(self, query: str, params: List[Any]) -> AsyncIterator[Dict[str, Any]]:
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                async for row in cursor:
+                    yield self._row_to_dict(row)
     
     async def clear_old_logs(self, days: int = 30) -> int:
-        """Delete logs older than the specified number of days asynchronously."""
-        from datetime import datetime, timedelta
-        
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        async with aiosqlite.connect(self.db_path) as conn:
-            # First count how many will be deleted
-            async with conn.execute(
-                "SELECT COUNT(*) FROM logs WHERE timestamp < ?", 
-                (cutoff_date,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                count_to_delete = row[0] if row else 0
+        """
+        Delete logs older than the specified number of days asynchronously.
+        Rows are deleted in bounded transactions so the log writer is never
+        locked out for long, then the freed pages are vacuumed.
+        """
+        cutoff_date = int((datetime.now() - timedelta(days=days)).timestamp() * 1_000_000)
+        deleted_count = 0
+        
+        async with self._write_lock:
+            conn = await self._get_write_conn()
             
-            # Then do the deletion
-            await conn.execute(
-                "DELETE FROM logs WHERE timestamp < ?", 
-                (cutoff_date,)
-            )
+            while True:
+                await conn.execute("BEGIN IMMEDIATE")
+                try:
+                    async with conn.execute(
+                        "DELETE FROM logs WHERE id IN (SELECT id FROM logs WHERE timestamp < ? LIMIT ?)", 
+                        (cutoff_date, _CLEANUP_BATCH_SIZE)
+                    ) as cursor:
+                        batch_count = cursor.rowcount
+                    await conn.execute("COMMIT")
+                except Exception:
+                    await conn.execute("ROLLBACK")
+                    raise
+                deleted_count += batch_count
+                if batch_count < _CLEANUP_BATCH_SIZE:
+                    break
             
-            await conn.commit()
+            # Hand the freed pages back to the OS. execute() only steps the pragma
+            # once (one page); executescript runs it to completion.
+            await conn.executescript("PRAGMA incremental_vacuum(1000);")
             
-            return count_to_delete 
\ No newline at end of file
+            return deleted_count 
@@ -8,6 +8,10 @@ from core.db_logging import AsyncDBLogHandler
 def setup_logging(log_level: str = "INFO", db_path: Optional[str] = None) -> None:
     """Configure logging for the application."""
     
+    configured_level = logging.getLevelNamesMapping().get(log_level.upper())
+    if configured_level is None:
+        raise ValueError(f"Invalid LOG_LEVEL: {log_level!r}")
+    
     # Create formatter
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -16,7 +20,7 @@ def setup_logging(log_level: str = "INFO", db_path: Optional[str] = None) -> Non
 
     # Configure root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
+    root_logger.setLevel(configured_level)
 
     # Remove existing handlers to avoid duplicates
     root_logger.handlers.clear()
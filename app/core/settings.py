@@ -1,6 +1,6 @@
 from typing import Annotated, Any
 
-from pydantic import BeforeValidator, HttpUrl, SecretStr, TypeAdapter, computed_field
+from pydantic import BeforeValidator, HttpUrl, PositiveInt, SecretStr, TypeAdapter, computed_field
 from pydantic_settings import BaseSettings
 
 from schema.models import (
@@ -33,6 +33,8 @@ class Settings(BaseSettings):
     # Logging configuration
     LOG_LEVEL: str = "INFO"
     LOG_DB_PATH: str = "logs/logs.db"
+    # Read connections for /logging queries; None uses the CPU count
+    LOG_DB_POOL_SIZE: PositiveInt | None = None
 
     def model_post_init(self, __context: Any) -> None:
         api_keys = {
@@ -11,10 +11,13 @@ from langchain_core.messages import (
 from functools import wraps
 from pydantic import BaseModel
 from starlette import status
+from starlette.exceptions import HTTPException
 import logging
 
 from schema import ChatMessage
 
+logger = logging.getLogger(__name__)
+
 class ValidationError(BaseModel):
     message: str
     members: list[str] = []
@@ -39,14 +42,11 @@ class JSONResponseException(Exception):
 def convert_message_content_to_string(content: str | list[str | dict]) -> str:
     if isinstance(content, str):
         return content
-    text: list[str] = []
-    for content_item in content:
-        if isinstance(content_item, str):
-            text.append(content_item)
-            continue
-        if content_item["type"] == "text":
-            text.append(content_item["text"])
-    return "".join(text)
+    return "".join(
+        content_item if isinstance(content_item, str) else content_item["text"]
+        for content_item in content
+        if isinstance(content_item, str) or content_item.get("type") == "text"
+    )
 
 
 def langchain_to_chat_message(message: BaseMessage) -> ChatMessage:
@@ -102,44 +102,42 @@ def remove_tool_calls(content: str | list[str | dict]) -> str | list[str | dict]
     
 class CoreUtils:
 
+    @staticmethod
+    def _handle_exception(func_name: str, e: Exception) -> JSONResponseException | HTTPException:
+        """Log an endpoint error and return the exception to raise for it."""
+        # Deliberate HTTP errors (e.g. a 400 for bad input) reach FastAPI unchanged
+        if isinstance(e, HTTPException):
+            return e
+        logger.error("Error in %s: %s", func_name, e, exc_info=True)
+        if isinstance(e, JSONResponseException):
+            return e
+        return JSONResponseException(status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     f"An unexpected error has occured.  {str(e)}")
+
     @staticmethod
     def exception_handling_decorator(func):
-        logger = logging.getLogger(__name__)
-        
         @wraps(func)
         def wrap(*args, **kwargs):
             try:
-                logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+                logger.debug("Calling %s with args: %r, kwargs: %r", func.__name__, args, kwargs)
                 result = func(*args, **kwargs)
-                logger.debug(f"{func.__name__} completed successfully")
+                logger.debug("%s completed successfully", func.__name__)
                 return result
-            except (Exception, JSONResponseException) as e:
-                logger.error(f"Error in {func.__name__}: {str(e)}", exc_info=True)
-                if type(e) is JSONResponseException:
-                    raise e
-                else:
-                    raise JSONResponseException(status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                                f"An unexpected error has occured.  {str(e)}")
+            except Exception as e:
+                raise CoreUtils._handle_exception(func.__name__, e)
 
         return wrap
 
     @staticmethod
     def aexception_handling_decorator(func):
-        logger = logging.getLogger(__name__)
-        
         @wraps(func)
         async def wrap(*args, **kwargs):
             try:
-                logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+                logger.debug("Calling %s with args: %r, kwargs: %r", func.__name__, args, kwargs)
                 result = await func(*args, **kwargs)
-                logger.debug(f"{func.__name__} completed successfully")
+                logger.debug("%s completed successfully", func.__name__)
                 return result
-            except (Exception, JSONResponseException) as e:
-                logger.error(f"Error in {func.__name__}: {str(e)}", exc_info=True)
-                if type(e) is JSONResponseException:
-                    raise e
-                else:
-                    raise JSONResponseException(status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                                f"An unexpected error has occured.  {str(e)}")
+            except Exception as e:
+                raise CoreUtils._handle_exception(func.__name__, e)
 
         return wrap 
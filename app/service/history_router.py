@@ -1,13 +1,10 @@
 import logging
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi import APIRouter
 from langchain_core.messages import AnyMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph.state import CompiledStateGraph
 
 from agents.agents import DEFAULT_AGENT, get_agent
-from core import settings
 from schema import ChatHistory, ChatHistoryInput, ChatMessage
 from core.utils import langchain_to_chat_message, CoreUtils
 
@@ -15,18 +12,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/history")
 
-def verify_bearer(
-    http_auth: Annotated[
-        HTTPAuthorizationCredentials | None,
-        Depends(HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)),
-    ],
-) -> None:
-    if not settings.AUTH_SECRET:
-        return
-    auth_secret = settings.AUTH_SECRET.get_secret_value()
-    if not http_auth or http_auth.credentials != auth_secret:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-
 @router.post("")
 @CoreUtils.exception_handling_decorator
 def history(input: ChatHistoryInput) -> ChatHistory:
@@ -49,9 +34,9 @@ def history(input: ChatHistoryInput) -> ChatHistory:
             return ChatHistory(messages=chat_messages)
         else:
             # Return empty history if thread exists but no messages
-            logger.info(f"Thread {input.thread_id} exists but has no messages")
+            logger.info("Thread %s exists but has no messages", input.thread_id)
             return ChatHistory(messages=[])
     except Exception as e:
         # If thread doesn't exist or other error, return empty history
-        logger.info(f"Error retrieving history for thread {input.thread_id}: {str(e)}")
+        logger.info("Error retrieving history for thread %s: %s", input.thread_id, e)
         return ChatHistory(messages=[]) 
\ No newline at end of file
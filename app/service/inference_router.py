@@ -1,19 +1,17 @@
 import json
 import logging
 from collections.abc import AsyncGenerator
-from typing import Annotated, Any
+from typing import Any
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Command
 
 from agents.agents import DEFAULT_AGENT, get_agent
-from core import settings
 from schema import ChatMessage, StreamInput, UserInput
 from app.core.utils import (
     convert_message_content_to_string,
@@ -25,18 +23,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/inference")
 
-def verify_bearer(
-    http_auth: Annotated[
-        HTTPAuthorizationCredentials | None,
-        Depends(HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)),
-    ],
-) -> None:
-    if not settings.AUTH_SECRET:
-        return
-    auth_secret = settings.AUTH_SECRET.get_secret_value()
-    if not http_auth or http_auth.credentials != auth_secret:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-
 def _parse_input(user_input: UserInput) -> tuple[dict[str, Any], UUID]:
     run_id = uuid4()
     thread_id = user_input.thread_id or str(uuid4())
@@ -69,7 +55,7 @@ async def invoke(user_input: UserInput) -> ChatMessage:
         output.run_id = str(run_id)
         return output
     except Exception as e:
-        logger.error(f"An exception occurred: {e}")
+        logger.error("An exception occurred: %s", e)
         raise HTTPException(status_code=500, detail="Unexpected error")
 
 async def message_generator(
@@ -110,7 +96,7 @@ async def message_generator(
                 chat_message = langchain_to_chat_message(message)
                 chat_message.run_id = str(run_id)
             except Exception as e:
-                logger.error(f"Error parsing message: {e}")
+                logger.error("Error parsing message: %s", e)
                 yield f"data: {json.dumps({'type': 'error', 'content': 'Unexpected error'})}\n\n"
                 continue
             # LangGraph re-sends the input message, which feels weird, so drop it
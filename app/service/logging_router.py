@@ -1,41 +1,27 @@
+import json
 import logging
-from typing import Annotated, List, Optional
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from uuid import uuid4
+import orjson
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from core import settings
 from app.core.utils import CoreUtils
-from core.db_logging import AsyncDBLogger
+from core.db_logging import AsyncDBLogger, AsyncDBLogHandler
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/logging")
+router = APIRouter(prefix="/logging", default_response_class=ORJSONResponse)
 
-class LogLevelUpdate(BaseModel):
-    level: str
+# /logging/entries only looks this far back unless start_time is given
+DEFAULT_LOG_WINDOW = timedelta(days=7)
 
-class LogEntry(BaseModel):
-    timestamp: str
+class LogLevelUpdate(BaseModel):
     level: str
-    logger_name: str
-    message: str
-    exc_info: Optional[str] = None
-    thread_name: Optional[str] = None
-    process_name: Optional[str] = None
-
-def verify_bearer(
-    http_auth: Annotated[
-        HTTPAuthorizationCredentials | None,
-        Depends(HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)),
-    ],
-) -> None:
-    if not settings.AUTH_SECRET:
-        return
-    auth_secret = settings.AUTH_SECRET.get_secret_value()
-    if not http_auth or http_auth.credentials != auth_secret:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
 @router.get("/level")
 @CoreUtils.aexception_handling_decorator
@@ -47,37 +33,106 @@ async def get_log_level():
 @CoreUtils.aexception_handling_decorator
 async def update_log_level(update: LogLevelUpdate):
     """Update log level."""
-    try:
-        level = update.level.upper()
-        logging.getLogger().setLevel(level)
-        logger.info(f"Log level updated to {level}")
-        return {"message": f"Log level updated to {level}"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid log level: {str(e)}")
+    level = update.level.upper()
+    if level not in logging.getLevelNamesMapping():
+        raise HTTPException(status_code=400, detail=f"Invalid log level: {update.level}")
+    logging.getLogger().setLevel(level)
+    logger.info("Log level updated to %s", level)
+    return {"message": f"Log level updated to {level}"}
+
+@router.get("/dropped")
+@CoreUtils.aexception_handling_decorator
+async def get_dropped_logs():
+    """Get the number of log records dropped because the database queue was full."""
+    handler = next(
+        (h for h in logging.getLogger().handlers if isinstance(h, AsyncDBLogHandler)), None
+    )
+    return {"dropped": handler.dropped_records if handler else 0}
 
-@router.get("/entries", response_model=List[LogEntry])
+@router.get("/entries")
 @CoreUtils.aexception_handling_decorator
 async def get_logs(
+    request: Request,
     level: Optional[str] = Query(None, description="Filter by log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)"),
-    start_time: Optional[str] = Query(None, description="Filter logs after this ISO timestamp (e.g., 2023-01-01T00:00:00)"),
-    end_time: Optional[str] = Query(None, description="Filter logs before this ISO timestamp (e.g., 2023-01-01T23:59:59)"),
+    start_time: Optional[datetime] = Query(None, description="Filter logs after this ISO timestamp (e.g., 2023-01-01T00:00:00). Defaults to 7 days ago"),
+    end_time: Optional[datetime] = Query(None, description="Filter logs before this ISO timestamp (e.g., 2023-01-01T23:59:59)"),
     logger_name: Optional[str] = Query(None, description="Filter by logger name"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of log entries to return")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of log entries to return"),
+    extra: Optional[str] = Query(None, description='JSON object of extra fields to match, e.g. {"request_id": "abc"}')
 ):
-    """Query logs from the database with optional filters."""
-    db_logger = AsyncDBLogger(db_path=settings.LOG_DB_PATH)
+    """Query logs from the database with optional filters, streamed as NDJSON (one log entry per line)."""
+    # Always query a bounded time range so the timestamp index is used
+    headers = {}
+    if start_time is None:
+        start_time = datetime.now() - DEFAULT_LOG_WINDOW
+        headers["X-Log-Start-Time-Default"] = start_time.isoformat()
+    
+    extra_filter = None
+    if extra is not None:
+        try:
+            extra_filter = json.loads(extra)
+        except ValueError:
+            extra_filter = None
+        if not isinstance(extra_filter, dict) or not all(
+            isinstance(value, (str, int, float)) for value in extra_filter.values()
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="extra must be a JSON object of string or number values"
+            )
     
-    logs = await db_logger.get_logs(level, start_time, end_time, logger_name, limit)
+    try:
+        logs = request.app.state.db_logger.iter_logs(
+            level,
+            start_time.isoformat(),
+            end_time.isoformat() if end_time else None,
+            logger_name,
+            limit,
+            extra_filter,
+        )
+    except ValueError as e:
+        # Unsupported extra keys
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    # Fetch the first row before responding, so waiting on a busy read pool
+    # becomes a 503 instead of a stream that stalls after the headers
+    try:
+        first = await anext(logs, None)
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Log database is busy, try again shortly"
+        )
+    
+    async def ndjson():
+        # Close the iterator as soon as streaming stops (including on client
+        # disconnect) so its read connection goes straight back to the pool
+        async with aclosing(logs):
+            if first is None:
+                return
+            yield orjson.dumps(first) + b"\n"
+            async for log in logs:
+                yield orjson.dumps(log) + b"\n"
     
-    return [LogEntry(**vars(log)) for log in logs]
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=headers)
 
-@router.delete("/cleanup")
+async def _cleanup_worker(db_logger: AsyncDBLogger, days: int, job_id: str) -> None:
+    """Delete old logs in the background after /cleanup has responded."""
+    try:
+        deleted_count = await db_logger.clear_old_logs(days)
+        logger.info("Cleanup %s deleted %d log entries older than %d days", job_id, deleted_count, days)
+    except Exception:
+        logger.exception("Cleanup %s failed", job_id)
+
+@router.delete("/cleanup", status_code=status.HTTP_202_ACCEPTED)
 @CoreUtils.aexception_handling_decorator
-async def cleanup_logs(days: int = Query(30, ge=1, description="Delete logs older than this many days")):
-    """Delete old logs from the database."""
-    db_logger = AsyncDBLogger(db_path=settings.LOG_DB_PATH)
-    
-    deleted_count = await db_logger.clear_old_logs(days)
+async def cleanup_logs(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    days: int = Query(30, ge=1, le=36500, description="Delete logs older than this many days (at most 100 years)")
+):
+    """Schedule deletion of old logs from the database."""
+    job_id = str(uuid4())
+    background_tasks.add_task(_cleanup_worker, request.app.state.db_logger, days, job_id)
     
-    logger.info(f"Deleted {deleted_count} log entries older than {days} days")
-    return {"message": f"Deleted {deleted_count} log entries older than {days} days"} 
\ No newline at end of file
+    return {"job_id": job_id, "message": f"Scheduled deletion of log entries older than {days} days"}
@@ -1,7 +1,7 @@
 import warnings
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from langchain_core._api import LangChainBetaWarning
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from agents.agents import get_agent, get_all_agent_info, DEFAULT_AGENT
@@ -11,6 +11,7 @@ from service.inference_router import router as inference_router
 from service.history_router import router as history_router
 from service.thread_router import router as thread_router
 from core.logging_config import setup_logging
+from core.db_logging import AsyncDBLogger
 from service.logging_router import router as logging_router
 import logging
 
@@ -18,6 +19,22 @@ warnings.filterwarnings("ignore", category=LangChainBetaWarning)
 
 logger = logging.getLogger(__name__)
 
+# AVAILABLE_MODELS is fixed at import, so sort it once
+_SORTED_MODELS: tuple[str, ...] = tuple(sorted(settings.AVAILABLE_MODELS))
+
+# Static probe response, encoded once
+_HEALTH_RESP = Response(content=b'{"status":"ok"}', media_type="application/json")
+
+# Checkpoint writes happen on every agent step; WAL with synchronous=NORMAL
+# avoids an fsync per commit and lets reads proceed during writes
+_CHECKPOINT_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA mmap_size=268435456;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-32000;
+"""
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifecycle manager for the FastAPI application."""
@@ -25,44 +42,62 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Setup logging first
     setup_logging(settings.LOG_LEVEL, settings.LOG_DB_PATH)
-    logger.info(f"Logging configured with level: {settings.LOG_LEVEL}")
+    logger.info("Logging configured with level: %s", settings.LOG_LEVEL)
+    
+    # Shared log reader so /logging requests reuse open connections
+    app.state.db_logger = AsyncDBLogger(
+        db_path=settings.LOG_DB_PATH, pool_size=settings.LOG_DB_POOL_SIZE
+    )
+    await app.state.db_logger.connect()
     
     # Initialize checkpointer
     try:
         async with AsyncSqliteSaver.from_conn_string("checkpoints.db") as saver:
+            # Shared with the routers so requests reuse the open connection
+            app.state.saver = saver
+            app.state.checkpoints_conn = saver.conn
+            await saver.conn.executescript(_CHECKPOINT_PRAGMAS)
+            # Create the checkpoint tables up front so /thread deletes work on a fresh
+            # database. Both primary keys lead with thread_id, which already gives the
+            # deletes an index, so no extra indexes are needed.
+            await saver.setup()
             logger.info("Initializing agents...")
             agents = get_all_agent_info()
             for a in agents:
                 agent = get_agent(a.key)
                 agent.checkpointer = saver
-                logger.debug(f"Agent {a.key} initialized with checkpointer")
+                logger.debug("Agent %s initialized with checkpointer", a.key)
+            
+            # Agents and models are fixed after startup, so /info is built once
+            app.state.service_metadata = ServiceMetadata(
+                agents=agents,
+                models=list(_SORTED_MODELS),
+                default_agent=DEFAULT_AGENT,
+                default_model=settings.DEFAULT_MODEL,
+            )
             logger.info("Application startup complete")
             yield
+            await app.state.db_logger.close()
     except Exception as e:
-        logger.error(f"Failed to initialize application: {e}")
+        logger.error("Failed to initialize application: %s", e)
         raise
 
 app = FastAPI(lifespan=lifespan)
 
 @app.get("/info")
-async def info() -> ServiceMetadata:
+async def info(request: Request) -> ServiceMetadata:
     logger.debug("Fetching service metadata")
-    models = list(settings.AVAILABLE_MODELS)
-    models.sort()
-    metadata = ServiceMetadata(
-        agents=get_all_agent_info(),
-        models=models,
-        default_agent=DEFAULT_AGENT,
-        default_model=settings.DEFAULT_MODEL,
-    )
-    logger.debug(f"Returning metadata: {metadata}")
+    metadata: ServiceMetadata = request.app.state.service_metadata
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Returning metadata agents=%d models=%d", len(metadata.agents), len(metadata.models)
+        )
     return metadata
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    logger.debug("Health check requested")
-    return {"status": "ok"}
+    return _HEALTH_RESP
 
 app.include_router(inference_router)
 app.include_router(history_router)
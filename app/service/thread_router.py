@@ -1,63 +1,45 @@
 import logging
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from fastapi import APIRouter, HTTPException, Request, status
 
-from core import settings
 from schema.schema import ThreadDeleteResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/thread")
 
-def verify_bearer(
-    http_auth: Annotated[
-        HTTPAuthorizationCredentials | None,
-        Depends(HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)),
-    ],
-) -> None:
-    if not settings.AUTH_SECRET:
-        return
-    auth_secret = settings.AUTH_SECRET.get_secret_value()
-    if not http_auth or http_auth.credentials != auth_secret:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-
 @router.delete("/{thread_id}")
-async def delete_thread(thread_id: str) -> ThreadDeleteResponse:
+async def delete_thread(thread_id: str, request: Request) -> ThreadDeleteResponse:
     """
     Delete a thread and its associated data using the thread_id.
     """
-    logger.info(f"Attempting to delete thread {thread_id}")
+    logger.debug("Attempting to delete thread %s", thread_id)
     try:
-        async with AsyncSqliteSaver.from_conn_string("checkpoints.db") as saver:
-            # Access the underlying SQLite connection
-            conn = saver.conn
-            
-            # Delete all checkpoints for this thread_id
-            async with conn.execute(
-                "DELETE FROM checkpoints WHERE thread_id = ?",
-                (thread_id,)
-            ):
-                pass
-                
-            # Delete all writes for this thread_id
-            async with conn.execute(
-                "DELETE FROM writes WHERE thread_id = ?",
-                (thread_id,)
-            ):
-                pass
-                
-            # Commit the changes
-            await conn.commit()
+        # Reuse the checkpoints connection opened by the app lifespan. Hold the
+        # saver's lock so these statements don't interleave with its own writes.
+        saver = request.app.state.saver
+        async with saver.lock:
+            conn = request.app.state.checkpoints_conn
             
-            logger.info(f"Thread {thread_id} successfully deleted from database")
-            return ThreadDeleteResponse(
-                success=True,
-                message=f"Thread {thread_id} successfully deleted"
-            )
+            # Delete the checkpoints and writes for this thread_id in one
+            # transaction, and never leave it open on the shared connection.
+            # The pinned langgraph-checkpoint-sqlite (2.0.6) has no
+            # adelete_thread, so the statements are issued here directly.
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                await conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                await conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        
+        logger.info("Thread %s successfully deleted from database", thread_id)
+        return ThreadDeleteResponse(
+            success=True,
+            message=f"Thread {thread_id} successfully deleted"
+        )
     except Exception as e:
-        logger.error(f"Error deleting thread {thread_id}: {e}", exc_info=True)
+        logger.error("Error deleting thread %s: %s", thread_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete thread: {str(e)}"